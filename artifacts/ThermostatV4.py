@@ -47,13 +47,14 @@
 #    4          Safe sensor/LCD/serial I/O; optional smoothing + hysteresis
 #    5          Daily schedule with binary-search lookup; manual offset over schedule
 #    6          Database logging (SQLite); readings and events tables; debug confirmations
+#    7          Performance pass: sampler, scheduler, DB writer and serial writer threads;
+#               RPi.GPIO edge-detect buttons; epoch timestamps; batched LCD writes
 # ------------------------------------------------------------------
 
 ##
 ## Import necessary to provide timing in the main loop
 ##
-from time import sleep
-from datetime import datetime
+from time import sleep, monotonic, time, localtime
 
 ##
 ## Imports required to allow us to build a fully functional state machine
@@ -80,47 +81,119 @@ import adafruit_character_lcd.character_lcd as characterlcd
 ## Raspberry Pi's serial port.
 ##
 import serial
+import io
 
 ##
-## Imports required to handle our Button, and our PWMLED devices
+## Imports required to handle our PWMLED devices, and the raw GPIO
+## edge detection used for the buttons
 ##
-from gpiozero import Button, PWMLED
+from gpiozero import PWMLED
+import RPi.GPIO as GPIO
 
 ##
 ## This package is necessary so that we can delegate the blinking
 ## lights to their own thread so that more work can be done at the
 ## same time
 ##
-from threading import Thread, Lock
-
-##
-## This is needed to get coherent matching of temperatures.
-##
-from math import floor
+from threading import Thread, Lock, Event, Timer
+import signal
 
 ##
 ## Additional helpers for optional smoothing and schedule search
 ##
-from collections import deque
+import array
 import bisect
+import sched
 import sqlite3
+from collections import deque
 import os
 
+##
+## Console logging (see DEBUG below)
+##
+import sys
+import queue
+import logging
+import logging.handlers
+
 ##
 ## DEBUG flag - boolean value to indicate whether or not to print
 ## status messages on the console of the program
 ##
 DEBUG = True
 
+##
+## Debug output goes through logging so messages are only formatted when
+## enabled. Records are handed to a queue and written to the console by a
+## listener thread, keeping console I/O off the display and button threads.
+##
+log = logging.getLogger("thermostat")
+log.setLevel(logging.DEBUG if DEBUG else logging.WARNING)
+log.propagate = False
+_log_queue = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_console = logging.StreamHandler(sys.stdout)
+_log_console.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_console)
+_log_listener.start()
+
+##
+## DEBUG is fixed at startup, so _dbg is bound once: the logger's debug
+## method when enabled, otherwise a no-op that skips the logger's level
+## check. Messages use lazy %-style arguments, so nothing is formatted
+## unless it will actually be printed.
+##
+def _noop(*args, **kwargs):
+    pass
+
+_dbg = log.debug if DEBUG else _noop
+
+##
+## Celsius -> Fahrenheit. The float result only feeds the moving average;
+## the display and serial status show whole degrees via _whole_f.
+##
+_FCOEF = 1.8
+_FOFF = 32.0
+
+def _f_from_c(t):
+    return _FCOEF * t + _FOFF
+
+##
+## Nearest whole degree (indoor readings are always positive)
+##
+def _whole_f(temp_f):
+    return int(temp_f + 0.5)
+
 ##
 ## Tunable parameters (Algorithms: smoothing, hysteresis, schedule)
 ##
 MA_WINDOW = 10
 HYSTERESIS_F = 1.0
 SAMPLE_PERIOD_S = 1
+SENSOR_PERIOD_S = SAMPLE_PERIOD_S
+SCHEDULE_PERIOD_S = 60
 STATUS_PERIOD_S = 30
+BUTTON_COALESCE_S = 0.15
 SCHEDULE_ENABLED = True
 
+##
+## LCD line templates, built once instead of per tick
+##
+_LINE1_FMT = b"%02d/%02d %02d:%02d:%02d"
+_LINE2_TEMP = b"Temp:%dF Set:%dF"
+_LINE2_NOTEMP = b"Temp:--F Set:%dF"
+_STATE_LABELS = {"off": b"OFF", "heat": b"HEAT", "cool": b"COOL"}
+_BLANKS = b" " * 16
+
+##
+## Copy data into frame[start:start+width], truncating or space-padding
+## it to exactly width bytes so the frame never changes size
+##
+def _put_field(frame, start, data, width=16):
+    n = min(len(data), width)
+    frame[start:start + n] = data[:n]
+    frame[start + n:start + width] = _BLANKS[:width - n]
+
 ##
 ## Daily schedule (time-of-day setpoints)
 ##
@@ -137,7 +210,7 @@ def _hhmm_to_minutes(hhmm):
     return int(h) * 60 + int(m)
 
 ##
-## Preprocess schedule for binary search
+## Preprocess schedule into sorted start times and setpoints
 ##
 _schedule_minutes = []
 _schedule_values = []
@@ -145,94 +218,209 @@ for entry in sorted(SCHEDULE_ENTRIES, key=lambda e: e["start"]):
     _schedule_minutes.append(_hhmm_to_minutes(entry["start"]))
     _schedule_values.append(int(entry["setpoint"]))
 
+##
+## Expand the schedule into a minute-of-day lookup table (1440 entries)
+## so the active setpoint is a single index instead of a search.
+## Minutes before the first entry wrap to the last entry of the day.
+##
+_schedule_lut = array.array('b', [0] * 1440)
+if _schedule_values:
+    _idx = -1
+    for _m in range(1440):
+        while (_idx + 1) < len(_schedule_minutes) and _schedule_minutes[_idx + 1] <= _m:
+            _idx += 1
+        _schedule_lut[_m] = _schedule_values[_idx]
+
+##
+## Scheduled setpoint at wall-clock time now_ts, and the time at which it
+## next changes. The boundary is capped an hour ahead so a DST shift can
+## only delay a change by that much.
+##
+def _schedule_at(now_ts):
+    lt = localtime(now_ts)
+    minutes = lt.tm_hour * 60 + lt.tm_min
+    idx = bisect.bisect_right(_schedule_minutes, minutes)
+    if idx < len(_schedule_minutes):
+        next_minutes = _schedule_minutes[idx]
+    else:
+        next_minutes = _schedule_minutes[0] + 1440
+    midnight = now_ts - (minutes * 60 + lt.tm_sec)
+    valid_until = min(midnight + next_minutes * 60, now_ts + 3600)
+    return _schedule_lut[minutes], valid_until
+
 ##
 ## Database setup and helper class
 ##
 class ThermostatDB:
+    ##
+    ## Rows are queued in memory by log_reading/log_event (no I/O on the
+    ## caller's thread). A writer thread started by start_writer() owns
+    ## the connection and drains the queues every FLUSH_PERIOD_S in a
+    ## single transaction, instead of one commit (fsync) per row. Batches
+    ## are inserted with multi-row VALUES statements of up to
+    ## INSERT_CHUNK rows each.
+    ##
+    SQL_READING_PREFIX = "INSERT INTO readings (timestamp, temperature, setpoint, state) VALUES "
+    SQL_READING_ROW = "(?, ?, ?, ?)"
+    SQL_EVENT_PREFIX = "INSERT INTO events (timestamp, event_type) VALUES "
+    SQL_EVENT_ROW = "(?, ?)"
+    INSERT_CHUNK = 50
+    FLUSH_PERIOD_S = 5
+
+    ##
+    ## Rows written before timestamps became epoch integers already hold
+    ## formatted text (and older tables keep TEXT affinity, which stores
+    ## new epochs as digit strings), so only values without a date
+    ## separator are converted
+    ##
+    SQL_LAST_READINGS = (
+        "SELECT CASE WHEN timestamp NOT LIKE '%-%'"
+        " THEN datetime(timestamp, 'unixepoch', 'localtime') ELSE timestamp END,"
+        " temperature, setpoint, state FROM readings ORDER BY id DESC LIMIT ?")
+
     def __init__(self, db_file="thermostat_data.db"):
         self.db_file = db_file
         self.conn = None
+        self._pending_readings = deque()
+        self._pending_events = deque()
+        self._pending_lock = Lock()
+        self._chunk_sql = {}
+        self._stop = False
+        self._wake = Event()
+        self._writer = None
         self._connect()
         self._create_tables()
 
     def _connect(self):
         try:
-            self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
-            if DEBUG:
-                print("* DB: Connected to thermostat_data.db")
+            ##
+            ## Autocommit mode (transactions are opened explicitly in
+            ## _drain). The fixed INSERT strings below are parsed once and
+            ## reused from sqlite3's default statement cache (128 entries).
+            ##
+            self.conn = sqlite3.connect(self.db_file, check_same_thread=False,
+                                        isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA cache_size=-4096")
+            _dbg("* DB: Connected to thermostat_data.db")
         except Exception as e:
-            if DEBUG:
-                print(f"* DB connection failed: {e}")
+            _dbg("* DB connection failed: %s", e)
 
     def _create_tables(self):
         try:
-            c = self.conn.cursor()
-            c.execute("""
+            self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS readings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
+                    timestamp INTEGER,
                     temperature REAL,
                     setpoint REAL,
                     state TEXT
                 )
             """)
-            c.execute("""
+            self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS events (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
+                    timestamp INTEGER,
                     event_type TEXT
                 )
             """)
-            self.conn.commit()
-            if DEBUG:
-                print("* DB: Tables ready")
+            _dbg("* DB: Tables ready")
         except Exception as e:
-            if DEBUG:
-                print(f"* DB table creation failed: {e}")
+            _dbg("* DB table creation failed: %s", e)
 
+    ##
+    ## Timestamps are stored as Unix epoch seconds and only formatted
+    ## when read back
+    ##
     def log_reading(self, temperature, setpoint, state):
-        try:
-            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            c = self.conn.cursor()
-            c.execute("INSERT INTO readings (timestamp, temperature, setpoint, state) VALUES (?, ?, ?, ?)",
-                      (ts, temperature, setpoint, state))
-            self.conn.commit()
-            if DEBUG:
-                print("* DB: Reading logged")
-        except Exception as e:
-            if DEBUG:
-                print(f"* DB reading insert failed: {e}")
+        ts = int(time())
+        with self._pending_lock:
+            self._pending_readings.append((ts, temperature, setpoint, state))
+        _dbg("* DB: Reading queued")
 
     def log_event(self, event_type):
+        ts = int(time())
+        with self._pending_lock:
+            self._pending_events.append((ts, event_type))
+        _dbg("* DB: Event queued (%s)", event_type)
+
+    def start_writer(self):
+        self._writer = Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    def stop_writer(self):
+        self._stop = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            ##
+            ## Never share the connection with a writer that is still
+            ## running; whatever it has not written yet is left queued
+            ##
+            if self._writer.is_alive():
+                _dbg("* DB writer did not stop; skipping final drain")
+                return
+        self._drain()
+
+    def _writer_loop(self):
+        while not self._stop:
+            self._wake.wait(timeout=self.FLUSH_PERIOD_S)
+            self._drain()
+
+    def _drain(self):
+        with self._pending_lock:
+            readings = list(self._pending_readings)
+            events = list(self._pending_events)
+            self._pending_readings.clear()
+            self._pending_events.clear()
+        if not readings and not events:
+            return
         try:
-            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            c = self.conn.cursor()
-            c.execute("INSERT INTO events (timestamp, event_type) VALUES (?, ?)",
-                      (ts, event_type))
-            self.conn.commit()
-            if DEBUG:
-                print(f"* DB: Event logged ({event_type})")
+            self.conn.execute("BEGIN")
+            self._insert_rows(self.SQL_READING_PREFIX, self.SQL_READING_ROW, readings)
+            self._insert_rows(self.SQL_EVENT_PREFIX, self.SQL_EVENT_ROW, events)
+            self.conn.execute("COMMIT")
+            _dbg("* DB: Flushed %s readings, %s events", len(readings), len(events))
         except Exception as e:
-            if DEBUG:
-                print(f"* DB event insert failed: {e}")
+            try:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            _dbg("* DB flush failed: %s", e)
+
+    def _insert_rows(self, prefix, row_marks, rows):
+        if len(rows) == 1:
+            self.conn.execute(prefix + row_marks, rows[0])
+            return
+        chunk = self.INSERT_CHUNK
+        for i in range(0, len(rows), chunk):
+            part = rows[i:i + chunk]
+            if len(part) == chunk:
+                sql = self._chunk_sql.get(prefix)
+                if sql is None:
+                    sql = self._chunk_sql[prefix] = prefix + ", ".join([row_marks] * chunk)
+            else:
+                sql = prefix + ", ".join([row_marks] * len(part))
+            self.conn.execute(sql, [v for row in part for v in row])
 
     def print_last_readings(self, limit=10):
         try:
-            c = self.conn.cursor()
-            c.execute("SELECT timestamp, temperature, setpoint, state FROM readings ORDER BY id DESC LIMIT ?", (limit,))
-            rows = c.fetchall()
+            rows = self.conn.execute(self.SQL_LAST_READINGS, (limit,))
             print("\n--- Last Readings ---")
             for row in rows:
                 print(f"Time: {row[0]} | Temp: {row[1]}F | Setpoint: {row[2]}F | State: {row[3]}")
             print("---------------------\n")
         except Exception as e:
-            if DEBUG:
-                print(f"* DB fetch failed: {e}")
+            _dbg("* DB fetch failed: %s", e)
 
 ##
 ## Initialize database
 ##
 db = ThermostatDB()
+db.start_writer()
 
 ##
 ## Create an I2C instance so that we can communicate with
@@ -240,21 +428,102 @@ db = ThermostatDB()
 ##
 i2c = board.I2C()
 
+##
+## AHTx0Fast - AHTx0 that exposes the two halves of a measurement, so a
+## caller can trigger it, release the bus during the ~80ms conversion,
+## and come back only to read the 6 result bytes
+##
+_AHT_CMD_TRIGGER = bytes((0xAC, 0x33, 0x00))
+_AHT_STATUS_BUSY = 0x80
+_AHT_CONVERSION_S = 0.08
+
+class AHTx0Fast(adafruit_ahtx0.AHTx0):
+    def _trigger_measurement(self):
+        with self.i2c_device as i2c:
+            i2c.write(_AHT_CMD_TRIGGER)
+
+    def _read_data(self, buf):
+        with self.i2c_device as i2c:
+            i2c.readinto(buf)
+        return buf
+
 ##
 ## Initialize our Temperature and Humidity sensor
 ##
 try:
-    thSensor = adafruit_ahtx0.AHTx0(i2c)
+    thSensor = AHTx0Fast(i2c)
 except Exception as e:
     thSensor = None
-    if DEBUG:
-        print(f"* Sensor init failed: {e}")
+    _dbg("* Sensor init failed: %s", e)
 
 ##
 ## Create a lock for I2C access
 ##
 i2c_lock = Lock()
 
+##
+## Set once to stop the display thread and the main loop
+##
+shutdown = Event()
+
+##
+## Scheduler that sleeps on the shutdown event and drops every pending
+## job once it is set, so run() returns immediately on shutdown
+##
+def _new_scheduler():
+    def wait(delay):
+        if shutdown.wait(delay):
+            for event in scheduler.queue:
+                scheduler.cancel(event)
+    scheduler = sched.scheduler(monotonic, wait)
+    return scheduler
+
+##
+## Queue task() on scheduler every period seconds from the monotonic time
+## start, until shutdown is set. Deadlines are absolute; a job that
+## overruns its next deadline is re-anchored to now rather than bursting.
+##
+def _every(scheduler, period, priority, task, start):
+    def run(when):
+        if shutdown.is_set():
+            return
+        task()
+        when += period
+        now = monotonic()
+        if when < now:
+            when = now
+        scheduler.enterabs(when, priority, run, (when,))
+    scheduler.enterabs(start, priority, run, (start,))
+
+##
+## AHT20 read with the I2C lock held only for the trigger write and the
+## result read, not across the conversion (as thSensor.temperature does)
+##
+def _read_celsius():
+    buf = bytearray(6)
+    with i2c_lock:
+        thSensor._trigger_measurement()
+    sleep(_AHT_CONVERSION_S)
+    for _ in range(10):
+        with i2c_lock:
+            thSensor._read_data(buf)
+        if not (buf[0] & _AHT_STATUS_BUSY):
+            break
+        sleep(0.01)
+    else:
+        raise RuntimeError("AHT20 busy")
+    raw = ((buf[3] & 0xF) << 16) | (buf[4] << 8) | buf[5]
+    return ((raw * 200.0) / 0x100000) - 50
+
+def _read_fahrenheit():
+    if thSensor is None:
+        return None
+    try:
+        return _f_from_c(_read_celsius())
+    except Exception as e:
+        _dbg("* Sensor read failed: %s", e)
+        return None
+
 ##
 ## Initialize our serial connection
 ##
@@ -269,8 +538,36 @@ try:
     )
 except Exception as e:
     ser = None
-    if DEBUG:
-        print(f"* Serial init failed: {e}")
+    _dbg("* Serial init failed: %s", e)
+
+##
+## Buffer status writes so each 30s update goes out in one flush,
+## and keep the state labels pre-encoded for the status line
+##
+bser = io.BufferedWriter(ser, buffer_size=64) if ser is not None else None
+_STATE_BYTES = {"off": b"off", "heat": b"heat", "cool": b"cool"}
+
+##
+## Status lines are handed to a dedicated writer thread through a small
+## queue, so a stalled receiver (ser timeout=1) cannot block the display.
+## If the queue is full the newest status is dropped; None stops the thread.
+##
+ser_q = queue.Queue(maxsize=32)
+
+def _ser_writer():
+    while True:
+        buf = ser_q.get()
+        if buf is None:
+            return
+        try:
+            bser.write(buf)
+            bser.flush()
+        except Exception as e:
+            _dbg("* Serial write failed: %s", e)
+
+if bser is not None:
+    _ser_thread = Thread(target=_ser_writer, daemon=True)
+    _ser_thread.start()
 
 ##
 ## Our two LEDs, utilizing GPIO 18, and GPIO 23
@@ -278,6 +575,62 @@ except Exception as e:
 redLight = PWMLED(18)
 blueLight = PWMLED(23)
 
+##
+## BatchedLCD - Character_LCD_Mono that can queue bytes instead of
+## bit-banging each one as it is written. Between beginBatch() and
+## flush() every command/character lands in a pending buffer; flush()
+## then drives the 4-bit bus for the whole frame in one tight loop. Each
+## byte gets a _LCD_SETTLE_S pause (covering the HD44780's ~37-40us
+## instruction time) instead of the library's 1ms sleep per byte. Only
+## the display thread drives the LCD, so no lock is needed.
+##
+_LCD_SETTLE_S = 0.00005
+
+class BatchedLCD(characterlcd.Character_LCD_Mono):
+    def __init__(self, *args, **kwargs):
+        self._pending = None
+        super().__init__(*args, **kwargs)
+
+    def beginBatch(self):
+        self._pending = bytearray()
+
+    def writeBytes(self, data):
+        for value in data:
+            self._write8(value, True)
+
+    def _write8(self, value, char_mode=False):
+        if self._pending is None:
+            super()._write8(value, char_mode)
+            return
+        self._pending.append(1 if char_mode else 0)
+        self._pending.append(value)
+
+    def flush(self):
+        pending = self._pending
+        self._pending = None
+        if not pending:
+            return
+        rs, en = self.reset, self.enable
+        d4, d5, d6, d7 = self.dl4, self.dl5, self.dl6, self.dl7
+        for i in range(0, len(pending), 2):
+            rs.value = pending[i] == 1
+            value = pending[i + 1]
+            for nibble in (value >> 4, value):
+                d4.value = (nibble & 1) > 0
+                d5.value = (nibble & 2) > 0
+                d6.value = (nibble & 4) > 0
+                d7.value = (nibble & 8) > 0
+                en.value = True
+                en.value = False
+            ##
+            ## Clear/home need ~1.5ms; every other instruction is done
+            ## within the short settle
+            ##
+            if not pending[i] and value < 4:
+                sleep(0.002)
+            else:
+                sleep(_LCD_SETTLE_S)
+
 ##
 ## ManagedDisplay - Class intended to manage the 16x2
 ## Display
@@ -292,11 +645,14 @@ class ManagedDisplay():
         self.lcd_d7 = digitalio.DigitalInOut(board.D26)
         self.lcd_columns = 16
         self.lcd_rows = 2
-        self.lcd = characterlcd.Character_LCD_Mono(
+        self.lcd = BatchedLCD(
             self.lcd_rs, self.lcd_en,
             self.lcd_d4, self.lcd_d5, self.lcd_d6, self.lcd_d7,
             self.lcd_columns, self.lcd_rows)
         self.lcd.clear()
+        self._prev_line1 = bytearray(_BLANKS)
+        self._prev_line2 = bytearray(_BLANKS)
+        self._stale = False
 
     def cleanupDisplay(self):
         try:
@@ -312,19 +668,47 @@ class ManagedDisplay():
         self.lcd_d6.deinit()
         self.lcd_d7.deinit()
 
-    def updateScreen(self, message):
-        parts = message.split("\n", 1)
-        line1 = (parts[0] if len(parts) > 0 else "").ljust(16)[:16]
-        line2 = (parts[1] if len(parts) > 1 else "").ljust(16)[:16]
+    ##
+    ## line1 and line2 are 16-byte ASCII buffers (bytes, bytearray or
+    ## memoryview); they are compared against copies of what was last
+    ## written, so the caller may keep reusing the same buffers
+    ##
+    def updateScreen(self, line1, line2):
         try:
-            self.lcd.clear()
-            self.lcd.cursor_position(0, 0)
-            self.lcd.message = line1
-            self.lcd.cursor_position(0, 1)
-            self.lcd.message = line2
+            self.lcd.beginBatch()
+            try:
+                self._writeChanged(0, self._prev_line1, line1)
+                self._writeChanged(1, self._prev_line2, line2)
+                self._stale = False
+            finally:
+                self.lcd.flush()
         except Exception as e:
-            if DEBUG:
-                print(f"* LCD write failed: {e}")
+            ##
+            ## The panel contents are unknown after a failed write, so
+            ## force a full rewrite of both lines on the next update
+            ##
+            self._stale = True
+            _dbg("* LCD write failed: %s", e)
+
+    ##
+    ## Write only the span of a line that differs from what is already
+    ## on the panel; nothing is sent if the line is unchanged
+    ##
+    def _writeChanged(self, row, old, new):
+        if self._stale:
+            first, last = 0, len(new) - 1
+        else:
+            first = 0
+            while first < len(new) and old[first] == new[first]:
+                first += 1
+            if first == len(new):
+                return
+            last = len(new) - 1
+            while old[last] == new[last]:
+                last -= 1
+        self.lcd.cursor_position(first, row)
+        self.lcd.writeBytes(new[first:last + 1])
+        old[first:last + 1] = new[first:last + 1]
 
 ##
 ## Initialize our display
@@ -333,22 +717,70 @@ screen = ManagedDisplay()
 
 ##
 ## Simple Moving Average helper (optional smoothing)
+## Fixed-size ring buffer over a double array with a running sum.
 ##
 class MovingAverage():
     def __init__(self, window=MA_WINDOW):
         self.window = max(1, int(window))
-        self.buf = deque()
+        self.buf = array.array('d', [0.0] * self.window)
+        self.n = 0
+        self.idx = 0
         self.sum = 0.0
+        self._inv_n = 0.0
 
     def push(self, x):
-        self.buf.append(x)
-        self.sum += x
-        if len(self.buf) > self.window:
-            self.sum -= self.buf.popleft()
+        old = self.buf[self.idx]
+        self.buf[self.idx] = x
+        if self.n < self.window:
+            self.sum += x
+            self.n += 1
+            self._inv_n = 1.0 / self.n
+        else:
+            self.sum += x - old
+        self.idx = (self.idx + 1) % self.window
         return self.value()
 
     def value(self):
-        return (self.sum / len(self.buf)) if self.buf else None
+        return (self.sum * self._inv_n) if self.n else None
+
+##
+## Sampler - owns the temperature sensor. A single thread reads it every
+## SENSOR_PERIOD_S, feeds the moving average and publishes the raw and
+## smoothed Fahrenheit values as plain attributes (a float/None attribute
+## store is atomic in CPython), so the display, lights, buttons and
+## serial status never wait on I2C. Both values are None after a failed
+## read, as a direct read used to return.
+##
+class Sampler(Thread):
+    def __init__(self, period=SENSOR_PERIOD_S):
+        super().__init__(daemon=True)
+        self.period = period
+        self.ma = MovingAverage(MA_WINDOW)
+        self.latest_f = None
+        self.smoothed_f = None
+
+    def sample(self):
+        t_f = _read_fahrenheit()
+        self.latest_f = t_f
+        self.smoothed_f = None if t_f is None else self.ma.push(t_f)
+
+    def run(self):
+        next_t = monotonic()
+        while not shutdown.is_set():
+            self.sample()
+            next_t += self.period
+            delay = next_t - monotonic()
+            if delay > 0:
+                shutdown.wait(delay)
+            else:
+                next_t = monotonic()
+
+##
+## Initialize the sampler with one reading before anything displays it
+##
+sampler = Sampler()
+sampler.sample()
+sampler.start()
 
 ##
 ## TemperatureMachine - StateMachine implementation
@@ -360,165 +792,290 @@ class TemperatureMachine(StateMachine):
     baseSetPoint = 72
     manualOffset = 0
     setPoint = 72
-    ma = MovingAverage(MA_WINDOW)
     cycle = (off.to(heat) | heat.to(cool) | cool.to(off))
 
+    def __init__(self):
+        self._stateId = "off"
+        self._lastControl = (None, None, None)
+        self._schedValidUntil = 0.0
+        self._schedBase = 72
+        self._pendingDelta = 0
+        self._deltaTimer = None
+        self._deltaLock = Lock()
+        self._lightsLock = Lock()
+        self._lightHandlers = {
+            "off": self._lightsOff,
+            "heat": self._lightsHeat,
+            "cool": self._lightsCool,
+        }
+        super().__init__()
+
     def on_enter_heat(self):
+        self._stateId = "heat"
         self.updateLights()
         db.log_event("state_change:heat")
-        if DEBUG:
-            print("* Changing state to heat")
+        _dbg("* Changing state to heat")
 
     def on_exit_heat(self):
         redLight.off()
 
     def on_enter_cool(self):
+        self._stateId = "cool"
         self.updateLights()
         db.log_event("state_change:cool")
-        if DEBUG:
-            print("* Changing state to cool")
+        _dbg("* Changing state to cool")
 
     def on_exit_cool(self):
         blueLight.off()
 
     def on_enter_off(self):
-        redLight.off()
-        blueLight.off()
+        self._stateId = "off"
+        with self._lightsLock:
+            redLight.off()
+            blueLight.off()
+            self._lastControl = ("off", "off", None)
         db.log_event("state_change:off")
-        if DEBUG:
-            print("* Changing state to off")
+        _dbg("* Changing state to off")
 
     def processTempStateButton(self):
-        if DEBUG:
-            print("Cycling Temperature State")
+        _dbg("Cycling Temperature State")
         db.log_event("button:mode")
         self.cycle()
 
     def processTempIncButton(self):
-        if DEBUG:
-            print("Increasing Set Point (manual offset)")
-        self.manualOffset += 1
-        db.log_event("button:increase")
-        self._refreshEffectiveSetPoint()
-        self.updateLights()
+        _dbg("Increasing Set Point (manual offset)")
+        self._queueOffsetChange(1)
 
     def processTempDecButton(self):
-        if DEBUG:
-            print("Decreasing Set Point (manual offset)")
-        self.manualOffset -= 1
-        db.log_event("button:decrease")
-        self._refreshEffectiveSetPoint()
+        _dbg("Decreasing Set Point (manual offset)")
+        self._queueOffsetChange(-1)
+
+    ##
+    ## Setpoint presses are coalesced: each one adds to a pending delta and
+    ## restarts a short timer, and only when presses stop for
+    ## BUTTON_COALESCE_S is the net change applied, with one event logged
+    ## and one light update
+    ##
+    def _queueOffsetChange(self, delta):
+        with self._deltaLock:
+            self._pendingDelta += delta
+            if self._deltaTimer is not None:
+                self._deltaTimer.cancel()
+            self._deltaTimer = Timer(BUTTON_COALESCE_S, self._applyOffsetChange)
+            self._deltaTimer.daemon = True
+            self._deltaTimer.start()
+
+    ##
+    ## Shutdown: stop any pending coalescing timer (waiting for it if it
+    ## is already running) and apply the remaining delta right away, so
+    ## it cannot fire after cleanup and its event is still logged
+    ##
+    def flushPendingOffset(self):
+        with self._deltaLock:
+            timer = self._deltaTimer
+        if timer is not None:
+            timer.cancel()
+            timer.join()
+        self._applyOffsetChange()
+
+    def _applyOffsetChange(self):
+        with self._deltaLock:
+            delta = self._pendingDelta
+            self._pendingDelta = 0
+            self._deltaTimer = None
+        if delta == 0:
+            return
+        self.manualOffset += delta
+        db.log_event("button:delta:%+d" % delta)
+        with self._lightsLock:
+            self._refreshEffectiveSetPoint(force=True)
         self.updateLights()
 
-    def _refreshEffectiveSetPoint(self):
+    ##
+    ## The scheduled setpoint only changes at schedule boundaries, so the
+    ## lookup caches the active base setpoint together with the wall-clock
+    ## time of the next boundary. Until then (or unless forced by a button
+    ## press) a refresh is one comparison plus re-applying the offset.
+    ##
+    def _refreshEffectiveSetPoint(self, force=False):
         if SCHEDULE_ENABLED and _schedule_minutes:
-            now = datetime.now()
-            minutes = now.hour * 60 + now.minute
-            idx = bisect.bisect_right(_schedule_minutes, minutes) - 1
-            if idx < 0:
-                base = _schedule_values[-1]
-            else:
-                base = _schedule_values[idx]
-            self.baseSetPoint = int(base)
+            now_ts = time()
+            if force or now_ts >= self._schedValidUntil:
+                self._schedBase, self._schedValidUntil = _schedule_at(now_ts)
+            self.baseSetPoint = self._schedBase
         self.setPoint = int(self.baseSetPoint + self.manualOffset)
 
+    ##
+    ## Called from the display scheduler, the button callback and the
+    ## coalescing timer; _lightsLock keeps the cached control and the
+    ## LEDs in step when those overlap
+    ##
     def updateLights(self):
-        self._refreshEffectiveSetPoint()
-        temp = self._getSmoothedFahrenheit()
-        redLight.off()
-        blueLight.off()
-        if DEBUG:
-            print(f"State: {self.current_state.id}")
-            print(f"BaseSetPoint: {self.baseSetPoint}  ManualOffset: {self.manualOffset}  EffectiveSetPoint: {self.setPoint}")
-            print(f"Temp(smoothed): {('--' if temp is None else round(temp,1))}")
-        state = self.current_state.id
-        if state == "off":
-            return
-        if temp is None:
-            if state == "heat":
-                redLight.value = 1.0
-            elif state == "cool":
-                blueLight.value = 1.0
-            return
-        if state == "heat":
-            if temp < (self.setPoint - HYSTERESIS_F):
-                redLight.pulse(fade_in_time=0.5, fade_out_time=0.5, n=None, background=True)
-            else:
-                redLight.value = 1.0
-            return
-        if state == "cool":
-            if temp > (self.setPoint + HYSTERESIS_F):
-                blueLight.pulse(fade_in_time=0.5, fade_out_time=0.5, n=None, background=True)
+        with self._lightsLock:
+            self._refreshEffectiveSetPoint()
+            temp = self._getSmoothedFahrenheit()
+            if DEBUG:
+                _dbg("State: %s", self._stateId)
+                _dbg("BaseSetPoint: %s  ManualOffset: %s  EffectiveSetPoint: %s",
+                     self.baseSetPoint, self.manualOffset, self.setPoint)
+                _dbg("Temp(smoothed): %s", '--' if temp is None else round(temp, 1))
+            control = self._lightHandlers[self._stateId](temp)
+            ##
+            ## Leave the LEDs alone when nothing changed, so a running pulse
+            ## keeps its fade phase and its gpiozero thread
+            ##
+            if control == self._lastControl:
+                return
+            self._lastControl = control
+            redLight.off()
+            blueLight.off()
+            mode, led = control[1], control[2]
+            if led is None:
+                return
+            light = redLight if led == "red" else blueLight
+            if mode == "pulse":
+                light.pulse(fade_in_time=0.5, fade_out_time=0.5, n=None, background=True)
             else:
-                blueLight.value = 1.0
-            return
+                light.value = 1.0
+
+    ##
+    ## Per-state light handlers: each decides (state, mode, led) for the
+    ## current reading without touching the LEDs; mode is one of off,
+    ## pulse, solid
+    ##
+    def _lightsOff(self, temp):
+        return ("off", "off", None)
+
+    def _lightsHeat(self, temp):
+        if temp is not None and temp < (self.setPoint - HYSTERESIS_F):
+            return ("heat", "pulse", "red")
+        return ("heat", "solid", "red")
+
+    def _lightsCool(self, temp):
+        if temp is not None and temp > (self.setPoint + HYSTERESIS_F):
+            return ("cool", "pulse", "blue")
+        return ("cool", "solid", "blue")
 
     def run(self):
-        myThread = Thread(target=self.manageMyDisplay)
-        myThread.start()
+        self._displayThread = Thread(target=self.manageMyDisplay)
+        self._displayThread.start()
+
+    def stopDisplay(self):
+        shutdown.set()
+        self._displayThread.join(timeout=5)
 
     def getFahrenheit(self):
-        if thSensor is None:
-            return None
-        try:
-            with i2c_lock:
-                t = thSensor.temperature
-            return (((9 / 5) * t) + 32)
-        except Exception as e:
-            if DEBUG:
-                print(f"* Sensor read failed: {e}")
-            return None
+        return sampler.latest_f
 
     def _getSmoothedFahrenheit(self):
-        t_f = self.getFahrenheit()
-        if t_f is None:
-            return None
-        return self.ma.push(t_f)
+        return sampler.smoothed_f
 
+    ##
+    ## Returns the encoded status line and the smoothed temperature it was
+    ## built from, so the status tick can log the same reading
+    ##
     def setupSerialOutput(self):
-        state = self.current_state.id
+        state = _STATE_BYTES[self._stateId]
         temp_sm = self._getSmoothedFahrenheit()
-        try:
-            temp_f = floor(temp_sm) if temp_sm is not None else "NA"
-        except Exception:
-            temp_f = "NA"
-        return f"{state},{temp_f},{self.setPoint}"
-
-    endDisplay = False
+        temp_f = b"%d" % _whole_f(temp_sm) if temp_sm is not None else b"NA"
+        return b"%s,%s,%d\n" % (state, temp_f, self.setPoint), temp_sm
 
+    ##
+    ## Display thread: a single sched.scheduler runs each job at its own
+    ## rate instead of one 1 Hz loop doing everything:
+    ##   schedule  every SCHEDULE_PERIOD_S (on the minute boundary)
+    ##   display   every SAMPLE_PERIOD_S   (LCD + periodic light check)
+    ##   status    every STATUS_PERIOD_S   (serial line + DB reading)
+    ## Jobs are queued on absolute monotonic deadlines, so I/O time does
+    ## not accumulate as drift; the scheduler sleeps on the shutdown
+    ## event so the thread exits as soon as shutdown is set.
+    ##
     def manageMyDisplay(self):
-        counter = 1
+        update_scr = screen.updateScreen
+        wall = time
+        local = localtime
+        line1_fmt = _LINE1_FMT
+        line2_fmt = _LINE2_TEMP
+        line2_nofmt = _LINE2_NOTEMP
+        labels = _STATE_LABELS
+        put = _put_field
+        whole_f = _whole_f
         altCounter = 1
-        while not self.endDisplay:
-            self._refreshEffectiveSetPoint()
-            current_time = datetime.now()
-            lcd_line_1 = current_time.strftime("%m/%d %H:%M:%S").ljust(16) + "\n"
+        line2_key = None
+        last_wall_sec = -1
+        ##
+        ## One 32-byte frame for both LCD lines, reused every tick; the
+        ## two line views over it are also created only once
+        ##
+        frame = bytearray(_BLANKS * 2)
+        view = memoryview(frame)
+        lcd_line_1 = view[:16]
+        lcd_line_2 = view[16:32]
+
+        def schedule_tick():
+            with self._lightsLock:
+                self._refreshEffectiveSetPoint()
+
+        def display_tick():
+            nonlocal altCounter, line2_key, last_wall_sec
+            ##
+            ## Line 1 only changes when the wall-clock second does
+            ##
+            sec = int(wall())
+            if sec != last_wall_sec:
+                last_wall_sec = sec
+                lt = local(sec)
+                put(frame, 0, line1_fmt % (lt.tm_mon, lt.tm_mday, lt.tm_hour, lt.tm_min, lt.tm_sec))
+            ##
+            ## Line 2 is only re-formatted when what it shows has changed
+            ##
             if altCounter < 6:
                 temp_sm = self._getSmoothedFahrenheit()
-                t_show = "--" if temp_sm is None else f"{floor(temp_sm)}"
-                lcd_line_2 = f"Temp:{t_show}F Set:{self.setPoint}F".ljust(16)[:16]
+                t_show = None if temp_sm is None else whole_f(temp_sm)
+                key = ("temp", t_show, self.setPoint)
+                if key != line2_key:
+                    line2_key = key
+                    if t_show is None:
+                        put(frame, 16, line2_nofmt % self.setPoint)
+                    else:
+                        put(frame, 16, line2_fmt % (t_show, self.setPoint))
                 altCounter += 1
             else:
-                state_label = self.current_state.id.upper()
-                lcd_line_2 = f"{state_label}".ljust(16)[:16]
+                key = ("state", self._stateId)
+                if key != line2_key:
+                    line2_key = key
+                    put(frame, 16, labels[self._stateId])
                 altCounter += 1
+                ##
+                ## Re-check the hysteresis band every ~10s; this only
+                ## touches the LEDs when the pulse/solid decision flips
+                ##
                 if altCounter >= 11:
                     self.updateLights()
                     altCounter = 1
-            screen.updateScreen(lcd_line_1 + lcd_line_2)
-            if (counter % STATUS_PERIOD_S) == 0:
+            update_scr(lcd_line_1, lcd_line_2)
+
+        def status_tick():
+            buf, temp_sm = self.setupSerialOutput()
+            if bser is not None:
                 try:
-                    if ser is not None:
-                        ser.write((self.setupSerialOutput() + "\n").encode("utf-8"))
-                    temp_val = self._getSmoothedFahrenheit()
-                    db.log_reading(temp_val if temp_val is not None else 0, self.setPoint, self.current_state.id)
-                except Exception as e:
-                    if DEBUG:
-                        print(f"* Serial or DB write failed: {e}")
-                counter = 1
-            else:
-                counter += 1
-            sleep(SAMPLE_PERIOD_S)
+                    ser_q.put_nowait(buf)
+                except queue.Full:
+                    _dbg("* Serial queue full, status dropped")
+            db.log_reading(temp_sm if temp_sm is not None else 0, self.setPoint, self._stateId)
+
+        scheduler = _new_scheduler()
+        start = monotonic()
+        to_minute = SCHEDULE_PERIOD_S - (wall() % SCHEDULE_PERIOD_S)
+        schedule_tick()
+        ##
+        ## Priorities order jobs that fall due together: setpoint first,
+        ## then the screen, then the status report
+        ##
+        _every(scheduler, SCHEDULE_PERIOD_S, 1, schedule_tick, start + to_minute)
+        _every(scheduler, SAMPLE_PERIOD_S, 2, display_tick, start)
+        _every(scheduler, STATUS_PERIOD_S, 3, status_tick, start + STATUS_PERIOD_S)
+        scheduler.run()
         screen.cleanupDisplay()
 
 ##
@@ -528,37 +1085,64 @@ tsm = TemperatureMachine()
 tsm.run()
 
 ##
-## Configure buttons
+## Configure buttons. All three share RPi.GPIO's single edge-detection
+## thread and are routed by pin, rather than one gpiozero thread each.
 ##
-blueButton = Button(24)
-blueButton.when_pressed = tsm.processTempStateButton
-redButton = Button(12)
-redButton.when_pressed = tsm.processTempIncButton
-yellowButton = Button(25)
-yellowButton.when_pressed = tsm.processTempDecButton
+BLUE_BUTTON_PIN = 24
+RED_BUTTON_PIN = 12
+YELLOW_BUTTON_PIN = 25
 
-##
-## Setup loop variable
-##
-repeat = True
+_button_handlers = {
+    BLUE_BUTTON_PIN: tsm.processTempStateButton,
+    RED_BUTTON_PIN: tsm.processTempIncButton,
+    YELLOW_BUTTON_PIN: tsm.processTempDecButton,
+}
+
+def dispatchButton(pin):
+    try:
+        _button_handlers[pin]()
+    except Exception as e:
+        _dbg("* Button %s handler failed: %s", pin, e)
+
+GPIO.setmode(GPIO.BCM)
+for _pin in _button_handlers:
+    GPIO.setup(_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    GPIO.add_event_detect(_pin, GPIO.FALLING, callback=dispatchButton, bouncetime=200)
 
 ##
-## Repeat until user interrupt
+## Shut down on Ctrl-C or SIGTERM; the main thread simply blocks until
+## one of them sets the shutdown event. Where a handler cannot be
+## installed (non-POSIX platforms), Ctrl-C still arrives as
+## KeyboardInterrupt and is treated the same way.
 ##
-while repeat:
+for _sig in ("SIGINT", "SIGTERM"):
     try:
-        sleep(30)
-    except KeyboardInterrupt:
-        print("Cleaning up. Exiting...")
-        repeat = False
-        tsm.endDisplay = True
-        sleep(1)
-        screen.cleanupDisplay()
-        try:
-            redLight.off(); blueLight.off()
-        except Exception:
-            pass
-        try:
-            db.print_last_readings()
-        except Exception:
-            pass
+        signal.signal(getattr(signal, _sig), lambda *a: shutdown.set())
+    except (AttributeError, ValueError, OSError):
+        pass
+try:
+    shutdown.wait()
+except KeyboardInterrupt:
+    shutdown.set()
+
+print("Cleaning up. Exiting...")
+for _pin in _button_handlers:
+    GPIO.remove_event_detect(_pin)
+tsm.flushPendingOffset()
+tsm.stopDisplay()
+if bser is not None:
+    try:
+        ser_q.put(None, timeout=1)
+        _ser_thread.join(timeout=2)
+    except queue.Full:
+        pass
+try:
+    redLight.off(); blueLight.off()
+except Exception:
+    pass
+try:
+    db.stop_writer()
+    db.print_last_readings()
+except Exception:
+    pass
+_log_listener.stop()